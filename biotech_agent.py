@@ -6,9 +6,26 @@ Runs automatically via GitHub Actions
 
 import feedparser
 import pandas as pd
-from datetime import datetime, timedelta
+import requests
+import xlsxwriter
+from lxml import etree
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from bisect import bisect_right
+from itertools import chain
+import io
+import json
 import re
 import os
+import threading
+import time
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+FETCH_TTL = 900  # seconds
+
+# Articles are stored column-wise: one list per field
+ARTICLE_FIELDS = ('title', 'link', 'published', 'published_dt', 'summary', 'source', '_text')
 
 class BiotechNewsAgent:
     def __init__(self):
@@ -20,6 +37,22 @@ class BiotechNewsAgent:
             'BioSpace': 'https://www.biospace.com/feed/',
         }
         
+        # One pooled session for all feeds, so connections (and their TLS
+        # handshakes) are reused across fetches and runs
+        self._session = requests.Session()
+        
+        # Feed workers log concurrently; whole lines only
+        self._print_lock = threading.Lock()
+        
+        # ETag/Last-Modified validators and articles from the previous run,
+        # so unchanged feeds come back as a cheap HTTP 304
+        self.cache_file = 'feed_cache.json'
+        self._feed_cache = self._load_feed_cache()
+        
+        # In-process results keyed by (feed_url, days_back), so repeated runs
+        # within FETCH_TTL seconds skip the network entirely
+        self._fetch_memo = {}
+        
         # Keywords for categorization
         self.keywords = {
             'revenue': ['revenue', 'earnings', 'quarterly results', 'q1', 'q2', 'q3', 'q4', 
@@ -32,28 +65,227 @@ class BiotechNewsAgent:
                           'spinout', 'established', 'announces formation']
         }
         
+        # One regex with a named group per category, so a single pass labels
+        # every category at once via match.lastgroup. The lookahead lets
+        # matches overlap across offsets, but at any one offset only the
+        # first matching category is reported, so a keyword must never be a
+        # prefix of a keyword in another category.
+        for category, keywords in self.keywords.items():
+            for other, other_keywords in self.keywords.items():
+                clashes = [(k, o) for k in keywords for o in other_keywords
+                           if other != category and o.startswith(k)]
+                if clashes:
+                    raise ValueError(f"Keyword {clashes[0][0]!r} ({category}) is a prefix of "
+                                     f"{clashes[0][1]!r} ({other}); one category would mask the other")
+        
+        self._combined = re.compile('(?=' + '|'.join(
+            f'(?P<{category}>' + '|'.join(re.escape(k) for k in keywords) + ')'
+            for category, keywords in self.keywords.items()
+        ) + ')')
+        
+    def _load_feed_cache(self):
+        """Load conditional-GET validators saved by a previous run"""
+        if not os.path.exists(self.cache_file):
+            return {}
+        
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                cache = json.load(f)
+            
+            # Dates are saved as ISO strings; restore them for cutoff comparisons
+            for entry in cache.values():
+                columns = entry['articles']
+                columns['published_dt'] = [
+                    datetime.fromisoformat(value) if value else None
+                    for value in columns['published_dt']
+                ]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"  ⚠ Ignoring unreadable feed cache: {e}")
+            return {}
+        
+        return cache
+    
+    def _save_feed_cache(self):
+        """Persist conditional-GET validators for the next run"""
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self._feed_cache, f, default=datetime.isoformat)
+        except OSError as e:
+            print(f"  ⚠ Could not save feed cache: {e}")
+    
+    def _log(self, message):
+        """Print one whole line, safe to call from feed worker threads"""
+        with self._print_lock:
+            print(message, flush=True)
+    
+    def _new_columns(self):
+        """Empty column store for articles"""
+        return {field: [] for field in ARTICLE_FIELDS}
+    
+    def _copy_columns(self, columns):
+        """Shallow copy of a column store"""
+        return {field: list(values) for field, values in columns.items()}
+    
+    def _parse_date(self, value):
+        """Parse an RSS (RFC 822) or Atom (ISO 8601) date to naive UTC, or None"""
+        if not value:
+            return None
+        
+        try:
+            dt = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            try:
+                dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                return None
+        
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        return dt
+    
+    def _drop_older_than(self, columns, cutoff):
+        """Keep articles published at or after cutoff; undated ones are kept"""
+        keep = [
+            i for i, published_dt in enumerate(columns['published_dt'])
+            if published_dt is None or published_dt >= cutoff
+        ]
+        return {field: [values[i] for i in keep] for field, values in columns.items()}
+    
+    def _add_article(self, columns, title, link, published, published_dt, summary, source_name):
+        """Append one article to a column store, lowercasing its searchable text once"""
+        columns['title'].append(title)
+        columns['link'].append(link)
+        columns['published'].append(published)
+        columns['published_dt'].append(published_dt)
+        columns['summary'].append(summary)
+        columns['source'].append(source_name)
+        columns['_text'].append((title + ' ' + summary).lower())
+    
+    def _atom_text(self, elem):
+        """All text inside an Atom text construct, including type="xhtml" markup"""
+        return ''.join(elem.itertext()) if elem is not None else ''
+    
+    def _parse_feed_xml(self, content, source_name):
+        """Stream RSS <item> / Atom <entry> elements out of raw feed XML.
+        Returns None if the document has no entries lxml recognises."""
+        articles = self._new_columns()
+        found_entries = False
+        
+        for _, elem in etree.iterparse(io.BytesIO(content), tag=('item', ATOM_NS + 'entry'),
+                                       resolve_entities=False):
+            found_entries = True
+            if elem.tag == 'item':
+                title = elem.findtext('title')
+                link = elem.findtext('link')
+                published = elem.findtext('pubDate')
+                summary = elem.findtext('description')
+            else:
+                # Prefer the rel="alternate" link (rel defaults to alternate);
+                # self/edit/replies links often come first
+                links = elem.findall(ATOM_NS + 'link')
+                link_elem = next(
+                    (l for l in links if l.get('rel', 'alternate') == 'alternate'),
+                    links[0] if links else None
+                )
+                title = self._atom_text(elem.find(ATOM_NS + 'title'))
+                link = link_elem.get('href') if link_elem is not None else ''
+                published = elem.findtext(ATOM_NS + 'published') or elem.findtext(ATOM_NS + 'updated')
+                summary = (self._atom_text(elem.find(ATOM_NS + 'summary'))
+                           or self._atom_text(elem.find(ATOM_NS + 'content')))
+            elem.clear()
+            
+            published = (published or '').strip()
+            
+            self._add_article(
+                articles,
+                (title or '').strip(),
+                (link or '').strip(),
+                published,
+                self._parse_date(published),
+                (summary or '').strip(),
+                source_name
+            )
+        
+        return articles if found_entries else None
+    
+    def _parse_feed_fallback(self, content, source_name):
+        """Parse feeds lxml cannot handle (malformed XML, RSS 1.0) with feedparser"""
+        feed = feedparser.parse(content)
+        articles = self._new_columns()
+        
+        for entry in feed.entries:
+            published = entry.get('published', '')
+            
+            self._add_article(
+                articles,
+                entry.get('title', ''),
+                entry.get('link', ''),
+                published,
+                self._parse_date(published),
+                entry.get('summary', ''),
+                source_name
+            )
+        
+        return articles
+    
     def fetch_news_from_feed(self, feed_url, source_name, days_back=30):
-        """Fetch articles from a single RSS feed"""
-        articles = []
-        cutoff_date = datetime.now() - timedelta(days=days_back)
+        """Fetch articles from a single RSS feed as a column store"""
+        articles = self._new_columns()
+        # Article dates are naive UTC (see _parse_date)
+        cutoff_date = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days_back)
+        
+        memo_key = (feed_url, days_back)
+        memo = self._fetch_memo.get(memo_key)
+        if memo and time.monotonic() - memo[0] < FETCH_TTL:
+            self._log(f"  Using {len(memo[1]['title'])} recently fetched articles from {source_name}")
+            return self._copy_columns(memo[1])
         
         try:
-            print(f"  Fetching from {source_name}...")
-            feed = feedparser.parse(feed_url)
+            self._log(f"  Fetching from {source_name}...")
+            cached = self._feed_cache.get(feed_url, {})
+            
+            headers = {}
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            # Fall back to our own last fetch time for servers that send no Last-Modified
+            modified = cached.get('modified') or cached.get('fetched')
+            if modified:
+                headers['If-Modified-Since'] = modified
+            
+            response = self._session.get(feed_url, headers=headers, timeout=10)
+            
+            if response.status_code == 304 and 'articles' in cached:
+                articles = self._drop_older_than(cached['articles'], cutoff_date)
+                self._log(f"    ✓ {source_name}: not modified, reusing {len(articles['title'])} cached articles")
+                self._fetch_memo[memo_key] = (time.monotonic(), self._copy_columns(articles))
+                return articles
             
-            for entry in feed.entries[:100]:  # Last 100 articles
-                articles.append({
-                    'title': entry.get('title', ''),
-                    'link': entry.get('link', ''),
-                    'published': entry.get('published', ''),
-                    'summary': entry.get('summary', ''),
-                    'source': source_name
-                })
+            response.raise_for_status()
             
-            print(f"    ✓ Found {len(articles)} articles")
+            try:
+                entries = self._parse_feed_xml(response.content, source_name)
+            except etree.XMLSyntaxError:
+                entries = None
+            if entries is None:
+                entries = self._parse_feed_fallback(response.content, source_name)
+            
+            # Cache every entry, not just this run's window, so a later run
+            # with a larger days_back still gets them back after a 304
+            self._feed_cache[feed_url] = {
+                'etag': response.headers.get('ETag'),
+                'modified': response.headers.get('Last-Modified'),
+                'fetched': formatdate(usegmt=True),
+                'articles': entries
+            }
+            
+            articles = self._drop_older_than(entries, cutoff_date)
+            
+            self._fetch_memo[memo_key] = (time.monotonic(), self._copy_columns(articles))
+            
+            self._log(f"    ✓ {source_name}: found {len(articles['title'])} articles")
             
         except Exception as e:
-            print(f"    ✗ Error fetching from {source_name}: {e}")
+            self._log(f"    ✗ Error fetching from {source_name}: {e}")
         
         return articles
     
@@ -63,30 +295,50 @@ class BiotechNewsAgent:
         print("COLLECTING NEWS FROM SOURCES")
         print("="*60)
         
-        all_articles = []
+        # Feeds are I/O-bound, so fetch them concurrently; results are
+        # collected in submission order so the report is ordered by feed
+        with ThreadPoolExecutor(max_workers=len(self.feeds)) as executor:
+            futures = [
+                executor.submit(self.fetch_news_from_feed, feed_url, source_name, days_back)
+                for source_name, feed_url in self.feeds.items()
+            ]
+            results = [future.result() for future in futures]
+        
+        self._save_feed_cache()
         
-        for source_name, feed_url in self.feeds.items():
-            articles = self.fetch_news_from_feed(feed_url, source_name, days_back)
-            all_articles.extend(articles)
+        all_articles = {
+            field: list(chain.from_iterable(result[field] for result in results))
+            for field in ARTICLE_FIELDS
+        }
         
-        print(f"\n✓ Total articles collected: {len(all_articles)}")
+        print(f"\n✓ Total articles collected: {len(all_articles['title'])}")
         return all_articles
     
-    def categorize_article(self, article):
-        """Determine which categories an article belongs to"""
-        text = (article['title'] + ' ' + article['summary']).lower()
+    def categorize_texts(self, texts):
+        """Flag the categories of many lowercased texts with a single scan.
         
-        categories = []
-        for category, keywords in self.keywords.items():
-            if any(keyword in text for keyword in keywords):
-                categories.append(category)
+        Texts are packed into one NUL-separated buffer with an offset table,
+        so the regex engine walks every article in one call; each match is
+        mapped back to its article by binary search on the offsets.
+        """
+        offsets = []
+        position = 0
+        for text in texts:
+            offsets.append(position)
+            position += len(text) + 1
+        packed = '\0'.join(texts)
         
-        return categories
+        flags = {category: [False] * len(texts) for category in self.keywords}
+        for match in self._combined.finditer(packed):
+            flags[match.lastgroup][bisect_right(offsets, match.start()) - 1] = True
+        
+        return flags
     
     def extract_company_name(self, text):
         """Try to extract company name from title (simple heuristic)"""
-        # Look for capitalized words at the start
-        words = text.split()
+        # Look for capitalized words at the start; only the first 5 words
+        # matter, so don't split the rest of the title
+        words = text.split(maxsplit=5)
         company_words = []
         
         for word in words[:5]:  # Check first 5 words
@@ -103,37 +355,36 @@ class BiotechNewsAgent:
         print("PROCESSING AND CATEGORIZING ARTICLES")
         print("="*60)
         
-        categorized = {
-            'revenue': [],
-            'acquisitions': [],
-            'funding': [],
-            'new_companies': []
+        # Report section -> keyword category
+        sections = {
+            'revenue': 'revenue',
+            'acquisitions': 'acquisition',
+            'funding': 'funding',
+            'new_companies': 'new_company'
         }
         
-        for article in articles:
-            categories = self.categorize_article(article)
-            
-            # Extract basic info
-            company = self.extract_company_name(article['title'])
-            
-            data = {
-                'Company': company,
-                'Date': article['published'][:10] if article['published'] else 'N/A',
-                'Title': article['title'],
-                'Source': article['source'],
-                'URL': article['link'],
-                'Summary': article['summary'][:200] + '...' if len(article['summary']) > 200 else article['summary']
-            }
-            
-            # Add to appropriate categories
-            if 'revenue' in categories:
-                categorized['revenue'].append(data)
-            if 'acquisition' in categories:
-                categorized['acquisitions'].append(data)
-            if 'funding' in categories:
-                categorized['funding'].append(data)
-            if 'new_company' in categories:
-                categorized['new_companies'].append(data)
+        df = pd.DataFrame(articles)
+        summary = df['summary'].fillna('')
+        # Kept as Python datetimes: xlsxwriter writes them natively, and
+        # datetime64 would overflow on far-future dates (past 2262)
+        published = df['published_dt'].astype(object)
+        
+        # Build every report column once; each category is then a row slice
+        report = pd.DataFrame({
+            'Company': df['title'].map(self.extract_company_name),
+            'Date': published.astype(object).where(published.notna(), 'N/A'),
+            'Title': df['title'],
+            'Source': df['source'],
+            'URL': df['link'],
+            'Summary': summary.mask(summary.str.len() > 200, summary.str.slice(0, 200) + '...')
+        })
+        
+        # One pass over all article text flags every category at once
+        flags = pd.DataFrame(self.categorize_texts(articles['_text']), index=df.index)
+        
+        categorized = {}
+        for section, category in sections.items():
+            categorized[section] = report.loc[flags[category]]
         
         # Print summary
         print(f"\n✓ Revenue articles: {len(categorized['revenue'])}")
@@ -143,8 +394,17 @@ class BiotechNewsAgent:
         
         return categorized
     
+    def _write_sheet(self, workbook, sheet_name, header, rows):
+        """Stream a header and rows into a new worksheet one row at a time"""
+        worksheet = workbook.add_worksheet(sheet_name)
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center'})
+        worksheet.write_row(0, 0, header, header_format)
+        
+        for row_num, row in enumerate(rows, start=1):
+            worksheet.write_row(row_num, 0, row)
+    
     def create_excel_report(self, categorized_data):
-        """Generate Excel report with multiple sheets"""
+        """Generate Excel report with multiple sheets from per-category DataFrames"""
         print("\n" + "="*60)
         print("GENERATING EXCEL REPORT")
         print("="*60)
@@ -152,41 +412,40 @@ class BiotechNewsAgent:
         month_year = datetime.now().strftime('%Y-%m')
         filename = f'Biotech_Pharma_Report_{month_year}.xlsx'
         
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            
-            # Summary Sheet
-            summary_data = {
-                'Category': ['Revenue Reports', 'Acquisitions', 'Funding Rounds', 'New Companies', 'Total Articles'],
-                'Count': [
-                    len(categorized_data['revenue']),
-                    len(categorized_data['acquisitions']),
-                    len(categorized_data['funding']),
-                    len(categorized_data['new_companies']),
-                    sum(len(v) for v in categorized_data.values())
-                ]
-            }
-            df_summary = pd.DataFrame(summary_data)
-            df_summary.to_excel(writer, sheet_name='Summary', index=False)
+        counts = {category: len(df) for category, df in categorized_data.items()}
+        
+        # constant_memory flushes each row to disk once written, so memory
+        # stays flat however large the report grows
+        with xlsxwriter.Workbook(filename, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd'
+        }) as workbook:
+            
+            # Summary Sheet (tiny, so written straight to the worksheet)
+            summary_rows = [
+                ('Revenue Reports', counts['revenue']),
+                ('Acquisitions', counts['acquisitions']),
+                ('Funding Rounds', counts['funding']),
+                ('New Companies', counts['new_companies']),
+                ('Total Articles', sum(counts.values()))
+            ]
+            self._write_sheet(workbook, 'Summary', ['Category', 'Count'], summary_rows)
             
             # Individual category sheets
-            for category, articles in categorized_data.items():
-                if articles:
-                    df = pd.DataFrame(articles)
+            for category, df in categorized_data.items():
+                if counts[category]:
                     sheet_name = category.replace('_', ' ').title()
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
+                    self._write_sheet(workbook, sheet_name, list(df.columns),
+                                      df.itertuples(index=False, name=None))
             
             # Metadata sheet
-            metadata = {
-                'Field': ['Report Generated', 'Report Period', 'Sources Used', 'Agent Version'],
-                'Value': [
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC'),
-                    datetime.now().strftime('%B %Y'),
-                    ', '.join(self.feeds.keys()),
-                    '1.0.0 (GitHub Actions)'
-                ]
-            }
-            df_metadata = pd.DataFrame(metadata)
-            df_metadata.to_excel(writer, sheet_name='Metadata', index=False)
+            metadata_rows = [
+                ('Report Generated', datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')),
+                ('Report Period', datetime.now().strftime('%B %Y')),
+                ('Sources Used', ', '.join(self.feeds.keys())),
+                ('Agent Version', '1.0.0 (GitHub Actions)')
+            ]
+            self._write_sheet(workbook, 'Metadata', ['Field', 'Value'], metadata_rows)
         
         print(f"\n✓ Excel report created: {filename}")
         return filename
@@ -204,7 +463,7 @@ class BiotechNewsAgent:
         # Step 1: Collect news
         articles = self.fetch_all_news(days_back)
         
-        if not articles:
+        if not articles['title']:
             print("\n⚠ Warning: No articles collected. Check RSS feeds.")
             return None
         